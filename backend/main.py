@@ -5,25 +5,47 @@ FastAPI backend serving the trained sentiment model.
 
 Run:
     uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+
+Inference endpoints are plain ``def`` so FastAPI runs them in its threadpool
+instead of blocking the event loop. Scale across cores with
+``--workers N`` (or ``WEB_CONCURRENCY``); each worker keeps its own stats.
 """
 
 import os
 import re
+import threading
 import time
+from collections import Counter, OrderedDict, deque
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 
 import joblib
 import numpy as np
+import scipy.sparse as sp
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 # ── Globals ──────────────────────────────────────────────────────────
 MODEL = None
 VECTORIZER = None
+FEATURE_NAMES = None
+UNIGRAM_MASK = None
+NET_COEF = None
 LABEL_MAP = {0: "negative", 1: "positive", 2: "neutral"}
-PREDICTION_LOG: list[dict] = []
+LABELS = tuple(LABEL_MAP[i] for i in range(len(LABEL_MAP)))
+PREDICTION_LOG: deque[dict] = deque(maxlen=1000)
+RECENT_PREDICTIONS: deque["PredictResponse"] = deque(maxlen=10)
+# Running aggregates over PREDICTION_LOG so /stats never rescans it.
+LABEL_COUNTS: Counter[str] = Counter()
+CONFIDENCE_SUM = 0.0
+LOG_LOCK = threading.Lock()
+# LRU of cleaned text -> (indices, data) of its TF-IDF row, so repeated inputs skip tokenizing.
+FEATURE_CACHE: OrderedDict[str, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+FEATURE_CACHE_SIZE = 4096
+CACHE_LOCK = threading.Lock()
 
 MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), "..", "model"))
 
@@ -32,7 +54,7 @@ MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), "..",
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load model artifacts on startup."""
-    global MODEL, VECTORIZER
+    global MODEL, VECTORIZER, FEATURE_NAMES, UNIGRAM_MASK, NET_COEF
 
     model_path = os.path.join(MODEL_DIR, "sentiment_model.pkl")
     vectorizer_path = os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl")
@@ -43,16 +65,37 @@ async def lifespan(app: FastAPI):
             "Run `python model/train.py --demo` first."
         )
 
-    MODEL = joblib.load(model_path)
-    VECTORIZER = joblib.load(vectorizer_path)
+    # Memory-map the arrays so workers share them through the page cache.
+    MODEL = joblib.load(model_path, mmap_mode="r")
+    VECTORIZER = joblib.load(vectorizer_path, mmap_mode="r")
+    try:
+        FEATURE_NAMES = VECTORIZER.get_feature_names_out()
+        UNIGRAM_MASK = np.array([" " not in name for name in FEATURE_NAMES])
+    except AttributeError:
+        # Hashed features (train.py --stream) have no vocabulary to explain with.
+        FEATURE_NAMES = None
+        UNIGRAM_MASK = None
+
+    # Per-feature (positive - negative) weight, used to explain predictions.
+    # A binary model has a single coef_ row that already points positive.
+    # For a binary float32 model this stays a view on the shared memmap.
+    coef = MODEL.coef_
+    NET_COEF = np.asarray(coef[0] if coef.shape[0] == 1 else coef[1] - coef[0], dtype=np.float32)
+    FEATURE_CACHE.clear()
 
     print(f"Model loaded from {model_path}")
+    if not isinstance(coef, np.memmap):
+        print("Warning: model weights are not memory-mapped; each worker holds its own copy")
     print(f"Vectorizer loaded from {vectorizer_path}")
 
     yield
 
     MODEL = None
     VECTORIZER = None
+    FEATURE_NAMES = None
+    UNIGRAM_MASK = None
+    NET_COEF = None
+    FEATURE_CACHE.clear()
 
 
 # ── App ──────────────────────────────────────────────────────────────
@@ -61,6 +104,7 @@ app = FastAPI(
     description="Real-time text sentiment prediction powered by scikit-learn",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -75,6 +119,7 @@ app.add_middleware(
 # ── Schemas ──────────────────────────────────────────────────────────
 class PredictRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=5000, examples=["I love this product!"])
+    explain: bool = False
 
 
 class WordScore(BaseModel):
@@ -96,6 +141,7 @@ class PredictResponse(BaseModel):
 
 class BatchPredictRequest(BaseModel):
     texts: list[str] = Field(..., min_length=1, max_length=50)
+    explain: bool = False
 
 
 class BatchPredictResponse(BaseModel):
@@ -106,6 +152,7 @@ class BatchPredictResponse(BaseModel):
 class CompareRequest(BaseModel):
     text_a: str = Field(..., min_length=1, max_length=5000)
     text_b: str = Field(..., min_length=1, max_length=5000)
+    explain: bool = False
 
 
 class CompareResponse(BaseModel):
@@ -129,75 +176,155 @@ class StatsResponse(BaseModel):
 
 
 # ── Text Preprocessing ───────────────────────────────────────────────
+# URLs go first so @/# cannot swallow an "http"/"www" prefix and leave the rest.
+_URL_RE = re.compile(r"http\S+|www\S+")
+_TAG_RE = re.compile(r"[@#]\w+")
+_NON_ALPHA_RE = re.compile(r"[^a-zA-Z\s]")
+# Deletes ASCII characters that are neither letters nor whitespace.
+_NON_ALPHA_TABLE = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if not (c.isalpha() or c.isspace()))
+)
+
+
+@lru_cache(maxsize=4096)
 def clean_text(text: str) -> str:
     """Mirror the preprocessing used during training."""
-    text = text.lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
-    text = re.sub(r"@\w+", "", text)
-    text = re.sub(r"#\w+", "", text)
-    text = re.sub(r"[^a-zA-Z\s]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = _TAG_RE.sub("", _URL_RE.sub("", text.lower())).translate(_NON_ALPHA_TABLE)
+    if not text.isascii():
+        text = _NON_ALPHA_RE.sub("", text)
+    return " ".join(text.split())
 
 
 # ── Prediction Logic ─────────────────────────────────────────────────
-def predict_sentiment(text: str) -> PredictResponse:
-    """Run inference on a single text input."""
-    cleaned = clean_text(text)
+def extract_key_words(features) -> list[dict]:
+    """Score the unigrams in a single TF-IDF row by their pull towards each class."""
+    key_words = []
+    if FEATURE_NAMES is None:
+        return key_words
+    try:
+        # Work on the CSR row's nonzeros directly; bigrams are skipped.
+        mask = UNIGRAM_MASK[features.indices]
+        idx = features.indices[mask]
+        net_scores = NET_COEF[idx] * features.data[mask]
+        magnitudes = np.abs(net_scores)
+        top = np.argpartition(-magnitudes, 8)[:8] if len(idx) > 8 else np.arange(len(idx))
+        top = top[np.argsort(-magnitudes[top], kind="stable")]
+        for i in top:
+            net_score = float(net_scores[i])
+            word_type = "positive" if net_score > 0 else "negative"
+            key_words.append({"word": FEATURE_NAMES[idx[i]], "score": round(abs(net_score), 4), "type": word_type})
+    except Exception:
+        pass
+    return key_words
+
+
+def _stack_rows(rows: list[tuple[np.ndarray, np.ndarray]]) -> sp.csr_matrix:
+    """Assemble cached (indices, data) rows into one CSR matrix."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+    return sp.csr_matrix(
+        (np.concatenate([data for _, data in rows]), np.concatenate([indices for indices, _ in rows]), indptr),
+        shape=(len(rows), MODEL.coef_.shape[1]),
+    )
+
+
+def vectorize(cleaned: list[str]) -> sp.csr_matrix:
+    """TF-IDF features for cleaned texts, transforming only cache misses."""
+    with CACHE_LOCK:
+        rows = [FEATURE_CACHE.get(c) for c in cleaned]
+        for c, row in zip(cleaned, rows):
+            if row is not None:
+                FEATURE_CACHE.move_to_end(c)
+
+    misses = list(dict.fromkeys(c for c, row in zip(cleaned, rows) if row is None))
+    if not misses:
+        return _stack_rows(rows)
+
+    transformed = VECTORIZER.transform(misses)
+    indptr, indices, data = transformed.indptr, transformed.indices, transformed.data
+    # Copies, so cached rows don't keep the whole transformed batch alive.
+    fresh = {
+        c: (indices[indptr[i]:indptr[i + 1]].copy(), data[indptr[i]:indptr[i + 1]].copy())
+        for i, c in enumerate(misses)
+    }
+    with CACHE_LOCK:
+        FEATURE_CACHE.update(fresh)
+        while len(FEATURE_CACHE) > FEATURE_CACHE_SIZE:
+            FEATURE_CACHE.popitem(last=False)
+
+    # All inputs were distinct misses: the transform is already in input order.
+    if len(misses) == len(cleaned):
+        return transformed
+    return _stack_rows([fresh[c] if row is None else row for c, row in zip(cleaned, rows)])
+
+
+def log_prediction(result: PredictResponse) -> None:
+    """Record a prediction, keeping the running stats in sync with the log."""
+    global CONFIDENCE_SUM
 
-    if not cleaned.strip():
+    with LOG_LOCK:
+        if len(PREDICTION_LOG) == PREDICTION_LOG.maxlen:
+            evicted = PREDICTION_LOG[0]
+            LABEL_COUNTS[evicted["prediction"]] -= 1
+            if not LABEL_COUNTS[evicted["prediction"]]:
+                del LABEL_COUNTS[evicted["prediction"]]
+            CONFIDENCE_SUM -= evicted["confidence"]
+
+        PREDICTION_LOG.append({"prediction": result.prediction, "confidence": result.confidence})
+        RECENT_PREDICTIONS.append(result)
+        LABEL_COUNTS[result.prediction] += 1
+        CONFIDENCE_SUM += result.confidence
+
+
+def predict_sentiment_batch(texts: list[str], explain: bool = False) -> list[PredictResponse]:
+    """Run inference on several texts with one vectorizer and one model call.
+
+    Key words are only extracted when ``explain`` is set.
+    """
+    cleaned = [clean_text(text) for text in texts]
+
+    if not all(c.strip() for c in cleaned):
         raise HTTPException(
             status_code=400,
             detail="Text is empty after preprocessing. Please provide meaningful text.",
         )
 
     start = time.perf_counter()
-    features = VECTORIZER.transform([cleaned])
-    proba = MODEL.predict_proba(features)[0]
-    pred_idx = int(np.argmax(proba))
-    elapsed_ms = (time.perf_counter() - start) * 1000
+    features = vectorize(cleaned)
+    proba = MODEL.predict_proba(features)
+    pred_idx = np.argmax(proba, axis=1)
+    # Per-item latency is the batch cost amortized over its inputs.
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(texts)
+    timestamp = datetime.now().isoformat()
+
+    # Round in float64: float32 models would otherwise leak digits like 0.4794999957.
+    rounded = np.round(proba.astype(np.float64, copy=False), 4).tolist()
+
+    results = []
+    for i, text in enumerate(texts):
+        probabilities = dict(zip(LABELS, rounded[i]))
+        key_words = extract_key_words(features[i]) if explain else []
+
+        result = PredictResponse(
+            text=text,
+            cleaned_text=cleaned[i],
+            prediction=LABEL_MAP[int(pred_idx[i])],
+            confidence=rounded[i][pred_idx[i]],
+            probabilities=probabilities,
+            inference_time_ms=elapsed_ms,
+            timestamp=timestamp,
+            key_words=[WordScore(**kw) for kw in key_words],
+        )
 
-    probabilities = {LABEL_MAP[i]: round(float(p), 4) for i, p in enumerate(proba)}
+        log_prediction(result)
+        results.append(result)
 
-    # Extract key word importance from TF-IDF + model coefficients
-    key_words = []
-    try:
-        feature_names = VECTORIZER.get_feature_names_out()
-        feature_indices = features.nonzero()[1]
-        tfidf_scores = features.toarray()[0]
-        pos_idx = 1  # positive class index
-        neg_idx = 0  # negative class index
-        for idx in feature_indices:
-            word = feature_names[idx]
-            if " " in word:
-                continue
-            tfidf_val = tfidf_scores[idx]
-            pos_coef = MODEL.coef_[pos_idx][idx] if hasattr(MODEL, "coef_") else 0
-            neg_coef = MODEL.coef_[neg_idx][idx] if hasattr(MODEL, "coef_") else 0
-            net_score = float((pos_coef - neg_coef) * tfidf_val)
-            word_type = "positive" if net_score > 0 else "negative"
-            key_words.append({"word": word, "score": round(abs(net_score), 4), "type": word_type})
-        key_words.sort(key=lambda x: x["score"], reverse=True)
-        key_words = key_words[:8]
-    except Exception:
-        pass
-
-    result = PredictResponse(
-        text=text,
-        cleaned_text=cleaned,
-        prediction=LABEL_MAP[pred_idx],
-        confidence=round(float(proba[pred_idx]), 4),
-        probabilities=probabilities,
-        inference_time_ms=round(elapsed_ms, 2),
-        timestamp=datetime.now().isoformat(),
-        key_words=[WordScore(**kw) for kw in key_words],
-    )
+    return results
 
-    PREDICTION_LOG.append(result.model_dump())
-    if len(PREDICTION_LOG) > 1000:
-        PREDICTION_LOG.pop(0)
 
-    return result
+def predict_sentiment(text: str, explain: bool = False) -> PredictResponse:
+    """Run inference on a single text input."""
+    return predict_sentiment_batch([text], explain)[0]
 
 
 # ── Routes ───────────────────────────────────────────────────────────
@@ -213,42 +340,47 @@ async def health_check():
 
 
 @app.post("/predict", response_model=PredictResponse)
-async def predict(request: PredictRequest):
+def predict(request: PredictRequest):
     """Predict sentiment for a single text input."""
     if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    return predict_sentiment(request.text)
+    return predict_sentiment(request.text, request.explain)
 
 
 @app.post("/predict/batch", response_model=BatchPredictResponse)
-async def predict_batch(request: BatchPredictRequest):
+def predict_batch(request: BatchPredictRequest):
     """Predict sentiment for multiple texts."""
     if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     start = time.perf_counter()
-    results = [predict_sentiment(text) for text in request.texts]
+    results = predict_sentiment_batch(request.texts, request.explain)
     total_ms = (time.perf_counter() - start) * 1000
 
     return BatchPredictResponse(
         results=results,
-        total_inference_time_ms=round(total_ms, 2),
+        total_inference_time_ms=total_ms,
     )
 
 
 @app.post("/compare", response_model=CompareResponse)
-async def compare(request: CompareRequest):
+def compare(request: CompareRequest):
     """Compare sentiment between two texts side by side."""
     if MODEL is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    result_a = predict_sentiment(request.text_a)
-    result_b = predict_sentiment(request.text_b)
-
-    delta = {
-        label: round(result_a.probabilities[label] - result_b.probabilities[label], 4)
-        for label in result_a.probabilities
-    }
+    if request.text_a == request.text_b:
+        # Identical inputs: score once and report no difference.
+        result_a = result_b = predict_sentiment(request.text_a, request.explain)
+        delta = {label: 0.0 for label in result_a.probabilities}
+    else:
+        result_a, result_b = predict_sentiment_batch(
+            [request.text_a, request.text_b], request.explain
+        )
+        delta = {
+            label: round(result_a.probabilities[label] - result_b.probabilities[label], 4)
+            for label in result_a.probabilities
+        }
 
     return CompareResponse(
         result_a=result_a,
@@ -268,14 +400,14 @@ async def get_stats():
             recent_predictions=[],
         )
 
-    labels = [p["prediction"] for p in PREDICTION_LOG]
-    distribution = {label: labels.count(label) for label in set(labels)}
-    avg_conf = sum(p["confidence"] for p in PREDICTION_LOG) / len(PREDICTION_LOG)
-
-    recent = [PredictResponse(**p) for p in PREDICTION_LOG[-10:][::-1]]
+    with LOG_LOCK:
+        total = len(PREDICTION_LOG)
+        distribution = dict(LABEL_COUNTS)
+        avg_conf = CONFIDENCE_SUM / total
+        recent = list(reversed(RECENT_PREDICTIONS))
 
     return StatsResponse(
-        total_predictions=len(PREDICTION_LOG),
+        total_predictions=total,
         label_distribution=distribution,
         avg_confidence=round(avg_conf, 4),
         recent_predictions=recent,
@@ -224,7 +224,7 @@ export default function App() {
       const res = await fetch(`${API_BASE}/predict`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text }),
+        body: JSON.stringify({ text, explain: true }),
       });
       if (!res.ok) throw new Error('API error');
       const r = await res.json();
@@ -245,7 +245,7 @@ export default function App() {
       const res = await fetch(`${API_BASE}/compare`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text_a: compareA, text_b: compareB }),
+        body: JSON.stringify({ text_a: compareA, text_b: compareB, explain: true }),
       });
       if (!res.ok) throw new Error('API error');
       const data = await res.json();
@@ -280,7 +280,7 @@ export default function App() {
             const batchRes = await fetch(`${API_BASE}/predict/batch`, {
               method: 'POST',
               headers: { 'Content-Type': 'application/json' },
-              body: JSON.stringify({ texts: batch }),
+              body: JSON.stringify({ texts: batch, explain: true }),
             });
             if (!batchRes.ok) throw new Error('API error');
             const data = await batchRes.json();
@@ -447,7 +447,7 @@ export default function App() {
                       </div>
                     </div>
                   )}
-                  <div style={{ fontSize: 10, fontFamily: "monospace", color: C.textMuted, textAlign: "right" }}>Inference: {result.inference_time_ms}ms</div>
+                  <div style={{ fontSize: 10, fontFamily: "monospace", color: C.textMuted, textAlign: "right" }}>Inference: {Number(result.inference_time_ms).toFixed(2)}ms</div>
                 </div>
               ) : (
                 <div style={{ ...emptyBox, height: 260 }}><div style={{ fontSize: 36, opacity: 0.15 }}>◎</div><span>Enter text or select a sample</span></div>
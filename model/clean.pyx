@@ -0,0 +1,101 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled batch version of ``train.clean_text``.
+
+Build in place with:
+    cythonize -i model/clean.pyx
+
+Two scans over each lowercased string reproduce the regex pipeline in
+train.py: the first drops URLs, the second drops @mentions and #hashtags from
+what is left, along with non-alpha characters, and collapses whitespace.
+"""
+
+from libc.stdlib cimport free, malloc
+
+
+cdef inline bint _is_space(Py_UCS4 c):
+    return c == u" " or (c > 127 and c.isspace()) or (u"\t" <= c <= u"\r") or (u"\x1c" <= c <= u"\x1f")
+
+
+cdef inline bint _is_word(Py_UCS4 c):
+    if c < 128:
+        return (u"a" <= c <= u"z") or (u"A" <= c <= u"Z") or (u"0" <= c <= u"9") or c == u"_"
+    return c.isalnum()
+
+
+cdef inline bint _starts_with(str text, Py_ssize_t i, Py_ssize_t n, str prefix):
+    cdef Py_ssize_t k, m = len(prefix)
+    if i + m > n:
+        return False
+    for k in range(m):
+        if text[i + k] != prefix[k]:
+            return False
+    return True
+
+
+cdef str _clean(str text):
+    cdef Py_ssize_t i = 0, j, n, m = 0, w = 0
+    cdef Py_UCS4 c
+    cdef bint pending_space = False
+    cdef Py_UCS4 *kept
+    cdef char *buf
+
+    text = text.lower()
+    n = len(text)
+    kept = <Py_UCS4 *>malloc(n * sizeof(Py_UCS4) + 1)
+    # Only ASCII letters and single spaces survive, so the output fits in n bytes.
+    buf = <char *>malloc(n + 1)
+    if kept == NULL or buf == NULL:
+        free(kept)
+        free(buf)
+        raise MemoryError()
+
+    try:
+        # Pass 1 -- http\S+ / www\S+: skip to the next whitespace. URLs must go
+        # before mentions/hashtags, or "#https://..." would leave the URL tail.
+        while i < n:
+            c = text[i]
+            j = 0
+            if c == u"h" and _starts_with(text, i, n, u"http"):
+                j = i + 4
+            elif c == u"w" and _starts_with(text, i, n, u"www"):
+                j = i + 3
+            if j and j < n and not _is_space(text[j]):
+                while j < n and not _is_space(text[j]):
+                    j += 1
+                i = j
+                continue
+            kept[m] = c
+            m += 1
+            i += 1
+
+        # Pass 2 -- [@#]\w+, then keep only letters and collapsed whitespace.
+        i = 0
+        while i < m:
+            c = kept[i]
+            if (c == u"@" or c == u"#") and i + 1 < m and _is_word(kept[i + 1]):
+                i += 2
+                while i < m and _is_word(kept[i]):
+                    i += 1
+                continue
+
+            if _is_space(c):
+                pending_space = True
+            elif u"a" <= c <= u"z" or u"A" <= c <= u"Z":
+                if pending_space and w:
+                    buf[w] = b" "
+                    w += 1
+                pending_space = False
+                buf[w] = <char>c
+                w += 1
+            i += 1
+
+        return buf[:w].decode("ascii")
+    finally:
+        free(kept)
+        free(buf)
+
+
+def clean_text_batch(list texts):
+    """Clean every string in ``texts``; non-string entries (e.g. NaN) pass through."""
+    return [_clean(<str>t) if isinstance(t, str) else t for t in texts]
@@ -7,6 +7,10 @@ Usage:
     # Full training with Sentiment140 dataset:
     python train.py --data path/to/sentiment140.csv
 
+    # Vocabulary-free training: hash the CSV in chunks, never holding the raw text
+    # column (the hashed matrix itself must still fit in memory):
+    python train.py --data path/to/sentiment140.csv --stream
+
     # Demo training with embedded sample data:
     python train.py --demo
 
@@ -26,7 +30,13 @@ from datetime import datetime
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import (
+    HashingVectorizer,
+    TfidfTransformer,
+    TfidfVectorizer,
+)
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (
     accuracy_score,
@@ -39,6 +49,12 @@ from sklearn.metrics import (
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 
+try:
+    # Optional compiled cleaner; build with `cythonize -i model/clean.pyx`.
+    from clean import clean_text_batch
+except ImportError:
+    clean_text_batch = None
+
 DEMO_DATA = {
     "text": [
         # Positive samples
@@ -150,17 +166,49 @@ DEMO_DATA = {
 
 LABEL_MAP = {0: "negative", 1: "positive", 2: "neutral"}
 REVERSE_LABEL_MAP = {"negative": 0, "positive": 1, "neutral": 2}
+MIN_DF_THRESHOLD = 100_000  # training rows above which rare n-grams are pruned
+HASH_FEATURES = 2**18
+SENTIMENT140_COLUMNS = ["target", "id", "date", "flag", "user", "text"]
+SENTIMENT140_LABELS = {0: 0, 2: 2, 4: 1}
+CLEAN_ROWS_PER_WORKER = 50_000  # smallest slice worth shipping to a worker process
+
+
+# URLs go first so @/# cannot swallow an "http"/"www" prefix and leave the rest.
+_URL_RE = re.compile(r"http\S+|www\S+")
+_TAG_RE = re.compile(r"[@#]\w+")
+_NON_ALPHA_RE = re.compile(r"[^a-zA-Z\s]")
+# Deletes ASCII characters that are neither letters nor whitespace.
+_NON_ALPHA_TABLE = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if not (c.isalpha() or c.isspace()))
+)
 
 
 def clean_text(text: str) -> str:
     """Preprocess text for model input."""
-    text = text.lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text)
-    text = re.sub(r"@\w+", "", text)
-    text = re.sub(r"#\w+", "", text)
-    text = re.sub(r"[^a-zA-Z\s]", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = _TAG_RE.sub("", _URL_RE.sub("", text.lower())).translate(_NON_ALPHA_TABLE)
+    if not text.isascii():
+        text = _NON_ALPHA_RE.sub("", text)
+    return " ".join(text.split())
+
+
+def _clean_chunk(texts: pd.Series) -> pd.Series:
+    """Clean one slice of a column, using the compiled cleaner if built."""
+    if clean_text_batch is not None:
+        return pd.Series(clean_text_batch(texts.tolist()), index=texts.index)
+    return texts.map(clean_text, na_action="ignore")
+
+
+def clean_text_series(texts: pd.Series, n_jobs: int = -1) -> pd.Series:
+    """Apply ``clean_text`` to a whole column, split across workers when it is large."""
+    n_chunks = min(joblib.effective_n_jobs(n_jobs), len(texts) // CLEAN_ROWS_PER_WORKER)
+    if n_chunks <= 1:
+        return _clean_chunk(texts)
+
+    bounds = np.linspace(0, len(texts), n_chunks + 1, dtype=int)
+    results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_clean_chunk)(texts.iloc[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])
+    )
+    return pd.concat(results)
 
 
 def load_sentiment140(filepath: str) -> pd.DataFrame:
@@ -170,24 +218,56 @@ def load_sentiment140(filepath: str) -> pd.DataFrame:
     Expected CSV columns: target, id, date, flag, user, text
     Target: 0 = negative, 2 = neutral, 4 = positive
     """
-    cols = ["target", "id", "date", "flag", "user", "text"]
-    df = pd.read_csv(filepath, encoding="latin-1", names=cols)
+    df = pd.read_csv(filepath, encoding="latin-1", names=SENTIMENT140_COLUMNS)
 
-    label_remap = {0: 0, 2: 2, 4: 1}
-    df["label"] = df["target"].map(label_remap)
-    df["text"] = df["text"].apply(clean_text)
+    df["label"] = df["target"].map(SENTIMENT140_LABELS)
+    df["text"] = clean_text_series(df["text"])
     df = df[["text", "label"]].dropna()
 
     return df
 
 
+def stream_sentiment140(
+    filepath: str, hasher: HashingVectorizer, chunksize: int = 100_000
+) -> tuple[sp.csr_matrix, np.ndarray]:
+    """
+    Hash Sentiment140 into raw term counts one CSV chunk at a time.
+    Only the sparse counts are kept, never the full text column or a vocabulary;
+    the combined count matrix is returned in memory.
+    """
+    blocks, labels = [], []
+    for chunk in pd.read_csv(
+        filepath, encoding="latin-1", names=SENTIMENT140_COLUMNS, chunksize=chunksize
+    ):
+        chunk["label"] = chunk["target"].map(SENTIMENT140_LABELS)
+        chunk["text"] = clean_text_series(chunk["text"])
+        chunk = chunk[["text", "label"]].dropna()
+        blocks.append(hasher.transform(chunk["text"]))
+        labels.append(chunk["label"].to_numpy(dtype=int))
+
+    return sp.vstack(blocks, format="csr"), np.concatenate(labels)
+
+
 def load_demo_data() -> pd.DataFrame:
     """Load embedded demo dataset."""
     df = pd.DataFrame(DEMO_DATA)
-    df["text"] = df["text"].apply(clean_text)
+    df["text"] = clean_text_series(df["text"])
     return df
 
 
+def parallel_transform(vectorizer, texts, n_jobs: int = -1):
+    """Transform texts with a fitted vectorizer, one chunk per worker."""
+    n_chunks = min(joblib.effective_n_jobs(n_jobs), len(texts))
+    if n_chunks <= 1:
+        return vectorizer.transform(texts)
+
+    chunks = np.array_split(texts, n_chunks)
+    results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(vectorizer.transform)(chunk) for chunk in chunks
+    )
+    return sp.vstack(results, format="csr")
+
+
 def train_model(df: pd.DataFrame, test_size: float = 0.2) -> dict:
     """Train sentiment classifier and return model artifacts + metrics."""
     X = df["text"].values
@@ -197,23 +277,72 @@ def train_model(df: pd.DataFrame, test_size: float = 0.2) -> dict:
         X, y, test_size=test_size, random_state=42, stratify=y
     )
 
+    # On large corpora, drop n-grams seen in fewer than 5 documents before
+    # they enter the vocabulary; small datasets keep everything.
+    min_df = 5 if len(X_train) >= MIN_DF_THRESHOLD else 1
+
+    # float32 output halves the feature matrix and the memory traffic of
+    # every gradient step in saga.
     vectorizer = TfidfVectorizer(
         max_features=50000,
         ngram_range=(1, 2),
-        min_df=1,
+        min_df=min_df,
         max_df=0.95,
         sublinear_tf=True,
+        dtype=np.float32,
     )
 
+    # fit already builds the training matrix internally, so keep it from
+    # fit_transform rather than tokenizing the split twice; only the test
+    # split gets a separate transform pass, which can run in parallel.
     X_train_tfidf = vectorizer.fit_transform(X_train)
-    X_test_tfidf = vectorizer.transform(X_test)
+    X_test_tfidf = parallel_transform(vectorizer, X_test)
+
+    return fit_and_evaluate(vectorizer, X_train_tfidf, X_test_tfidf, y_train, y_test)
 
+
+def train_model_streaming(filepath: str, test_size: float = 0.2) -> dict:
+    """
+    Train on Sentiment140 with hashed features, without a fitted vocabulary.
+    The full hashed matrix is held in memory, so this is not out-of-core.
+    """
+    hasher = HashingVectorizer(
+        n_features=HASH_FEATURES,
+        ngram_range=(1, 2),
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+    X, y = stream_sentiment140(filepath, hasher)
+    print(f"Dataset: {X.shape[0]} samples")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=42, stratify=y
+    )
+    # The split copies the rows; drop the original so only one copy stays alive.
+    del X
+
+    # IDF comes from the training split's document frequencies, one pass over the counts.
+    # Weighting is applied in place so the count matrices are not copied again.
+    tfidf = TfidfTransformer(sublinear_tf=True)
+    tfidf.fit(X_train)
+    X_train_tfidf = tfidf.transform(X_train, copy=False)
+    X_test_tfidf = tfidf.transform(X_test, copy=False)
+
+    vectorizer = Pipeline([("hash", hasher), ("tfidf", tfidf)])
+    return fit_and_evaluate(vectorizer, X_train_tfidf, X_test_tfidf, y_train, y_test)
+
+
+def fit_and_evaluate(vectorizer, X_train_tfidf, X_test_tfidf, y_train, y_test) -> dict:
+    """Fit the classifier on prepared features and report held-out metrics."""
+    # saga handles large sparse inputs well; it converges best on scaled
+    # features, which sublinear_tf + l2-normalized TF-IDF rows provide.
     model = LogisticRegression(
         C=1.0,
         max_iter=1000,
-        solver="lbfgs",
+        solver="saga",
+        tol=1e-3,
         random_state=42,
-        n_jobs=-1,
     )
 
     print("Training model...")
@@ -225,7 +354,8 @@ def train_model(df: pd.DataFrame, test_size: float = 0.2) -> dict:
     y_pred = model.predict(X_test_tfidf)
     y_proba = model.predict_proba(X_test_tfidf)
 
-    target_names = [LABEL_MAP[i] for i in sorted(LABEL_MAP.keys()) if i in np.unique(y)]
+    labels_seen = np.union1d(y_train, y_test)
+    target_names = [LABEL_MAP[i] for i in sorted(LABEL_MAP.keys()) if i in labels_seen]
 
     metrics = {
         "accuracy": float(accuracy_score(y_test, y_pred)),
@@ -237,8 +367,8 @@ def train_model(df: pd.DataFrame, test_size: float = 0.2) -> dict:
         ),
         "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
         "training_time_seconds": round(train_time, 2),
-        "train_samples": len(X_train),
-        "test_samples": len(X_test),
+        "train_samples": X_train_tfidf.shape[0],
+        "test_samples": X_test_tfidf.shape[0],
     }
 
     print(f"\n{'='*50}")
@@ -266,12 +396,25 @@ def save_artifacts(artifacts: dict, output_dir: str = ".") -> None:
     vectorizer_path = os.path.join(output_dir, "tfidf_vectorizer.pkl")
     metadata_path = os.path.join(output_dir, "metadata.json")
 
-    joblib.dump(artifacts["model"], model_path)
-    joblib.dump(artifacts["vectorizer"], vectorizer_path)
+    # Inference needs only a few digits of probability; single precision
+    # halves the weights read per prediction.
+    model = artifacts["model"]
+    model.coef_ = model.coef_.astype(np.float32)
+    model.intercept_ = model.intercept_.astype(np.float32)
+
+    # Left uncompressed so the API can memory-map the arrays on load.
+    joblib.dump(artifacts["model"], model_path, compress=0)
+    joblib.dump(artifacts["vectorizer"], vectorizer_path, compress=0)
+
+    vectorizer = artifacts["vectorizer"]
+    if isinstance(vectorizer, Pipeline):
+        vectorizer_type = "+".join(type(step).__name__ for _, step in vectorizer.steps)
+    else:
+        vectorizer_type = type(vectorizer).__name__
 
     metadata = {
         "model_type": "LogisticRegression",
-        "vectorizer_type": "TfidfVectorizer",
+        "vectorizer_type": vectorizer_type,
         "label_map": LABEL_MAP,
         "metrics": artifacts["metrics"],
         "trained_at": datetime.now().isoformat(),
@@ -289,10 +432,26 @@ def save_artifacts(artifacts: dict, output_dir: str = ".") -> None:
 def main():
     parser = argparse.ArgumentParser(description="Train sentiment analysis model")
     parser.add_argument("--data", type=str, help="Path to Sentiment140 CSV")
-    parser.add_argument("--demo", action="store_true", help="Use embedded demo data")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--demo", action="store_true", help="Use embedded demo data")
+    mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Hash --data in chunks without building a vocabulary "
+        "(the hashed matrix must still fit in memory)",
+    )
     parser.add_argument("--output", type=str, default=".", help="Output directory")
     args = parser.parse_args()
 
+    if args.stream and not args.data:
+        parser.error("--stream requires --data")
+
+    if args.stream:
+        print(f"Streaming Sentiment140 from {args.data}...")
+        artifacts = train_model_streaming(args.data)
+        save_artifacts(artifacts, output_dir=args.output)
+        return
+
     if args.demo:
         print("Loading demo dataset...")
         df = load_demo_data()